@@ -1,89 +1,769 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+# When gevent is installed (e.g. running under `gunicorn -k gevent`), make blocking
+# socket I/O cooperative so googletrans and gTTS calls waiting on Google don't hold
+# an OS thread each. This must run before anything else imports socket/ssl/threading.
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
+from flask import Flask, render_template, request, jsonify, send_from_directory, url_for
+from flask.json.provider import DefaultJSONProvider
 from googletrans import Translator, LANGUAGES
 from gtts import gTTS
+import httpx
 import os
-import uuid
 import time
 import json
+import hashlib
+import base64
+import sqlite3
+import threading
+import queue
+import functools
+import re
+import random
+import logging
+import logging.handlers
+import atexit
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, Future
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import fasttext
+except ImportError:
+    fasttext = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson; jsonify() responses are encoded straight to bytes."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+# Use the faster orjson encoder for JSON requests/responses when it is installed
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 # Directory to save temporary audio files (must be inside 'static' for web access)
-app.config['UPLOAD_FOLDER'] = 'static/audio'
+app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'audio')
+# Audio files are content-addressed and never change, so browsers/CDNs may cache them for a year
+app.config['AUDIO_CACHE_MAX_AGE'] = 365 * 24 * 60 * 60
 # IMPORTANT: CHANGE THIS TO A STRONG, UNIQUE KEY IN PRODUCTION!
 app.config['SECRET_KEY'] = 'a_new_strong_secret_key_for_flask_sessions'
 
 # Ensure the upload folder exists within the static directory
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Audio files not accessed for this many days are deleted by the background sweeper
+app.config['AUDIO_CACHE_MAX_AGE_DAYS'] = 7
+
+# Persistent translation cache (SQLite) shared by all Flask workers on this host
+app.config['TRANSLATION_CACHE_DB'] = os.path.join(app.root_path, 'translation_cache.db')
+# When set (e.g. redis://localhost:6379/0), Redis replaces SQLite as the shared translation
+# cache and also holds synthesized audio, so every worker and host sees every entry
+app.config['REDIS_URL'] = os.environ.get('REDIS_URL')
+# Maximum number of translations kept in the in-process LRU cache
+app.config['TRANSLATION_CACHE_SIZE'] = 10000
+# Translations older than this are ignored and periodically pruned from SQLite
+app.config['TRANSLATION_CACHE_TTL'] = 72 * 60 * 60
+# Cache misses are batched into one Google Translate call of at most this many texts...
+app.config['TRANSLATION_BATCH_SIZE'] = 25
+# ...collected for at most this long after the first one arrives
+app.config['TRANSLATION_BATCH_LATENCY_MS'] = 20
+# After Google rate-limits us, skip upstream calls for this many seconds
+app.config['TRANSLATION_CIRCUIT_COOLDOWN'] = 30
+# fastText language-identification model used to detect 'auto' sources locally
+# (download lid.176.ftz from https://fasttext.cc/docs/en/language-identification.html)
+app.config['FASTTEXT_LID_MODEL'] = os.environ.get('FASTTEXT_LID_MODEL', os.path.join(app.root_path, 'lid.176.ftz'))
+# Local detections below this probability are left to Google
+app.config['LOCAL_LID_MIN_CONFIDENCE'] = 0.9
+# Open the connection to Google in the background at startup (TRANSLATOR_PREWARM=0 disables)
+app.config['TRANSLATOR_PREWARM'] = os.environ.get('TRANSLATOR_PREWARM', '1') != '0'
+# Log level for this module's logger (DEBUG shows per-request translation/TTS detail)
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# --- Logging ---
+# Request threads only put records on a queue; a QueueListener thread does the blocking
+# writes to stderr, so logging never stalls a request on terminal/pipe I/O.
+logger = logging.getLogger(__name__)
+logger.setLevel(app.config['LOG_LEVEL'])
+logger.propagate = False
+_log_listener = None
+
+def _start_log_listener():
+    """Routes this module's log records through a fresh queue and background writer thread."""
+    global _log_listener
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(message)s'))
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+
+def _stop_log_listener():
+    # Flushes any queued records before the process exits
+    if _log_listener is not None:
+        _log_listener.stop()
+
+_start_log_listener()
+atexit.register(_stop_log_listener)
+# The writer thread doesn't survive fork (e.g. gunicorn preload_app), so each child starts its own
+os.register_at_fork(after_in_child=_start_log_listener)
+
+# Initialize Translator with a single pooled keep-alive HTTP/2 client shared by all requests,
+# so translations reuse open connections to Google instead of paying for TCP+TLS setup.
+# (httpx.Timeout/PoolLimits use the httpx 0.13 API that googletrans pins.)
+translator = Translator(timeout=httpx.Timeout(5.0, connect_timeout=2.0))
+translator.client = httpx.Client(
+    http2=True,
+    headers=translator.client.headers,
+    timeout=translator.client.timeout,
+    pool_limits=httpx.PoolLimits(max_keepalive=20, max_connections=100),
+)
+translator.token_acquirer.client = translator.client
+# googletrans 4.0.0rc1 checks `self.raise_Exception` (sic) on non-200 replies; without it a
+# 429 surfaces as an AttributeError instead of 'Unexpected status code "429"'
+translator.raise_Exception = True
+
+# Load the local language-identification model, if available
+lid_model = None
+if fasttext is not None and os.path.exists(app.config['FASTTEXT_LID_MODEL']):
+    lid_model = fasttext.load_model(app.config['FASTTEXT_LID_MODEL'])
+
+# fastText labels that differ from googletrans language codes
+_FASTTEXT_TO_GOOGLETRANS = {'zh': 'zh-cn', 'jv': 'jw'}
+
+# Language dropdown entries sorted by display name, computed once at import
+SORTED_LANGUAGES = tuple(sorted(LANGUAGES.items(), key=lambda item: item[1]))
+
+# Shared cache client (None when Redis isn't configured or installed)
+redis_client = None
+if app.config['REDIS_URL']:
+    if redis is None:
+        logger.warning("REDIS_URL is set but the redis package is not installed; falling back to SQLite.")
+    else:
+        # Blocking pool: when all 32 connections are busy, wait briefly for one instead of
+        # failing with "Too many connections" (which would turn load into cache misses)
+        redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(
+            app.config['REDIS_URL'], max_connections=32, timeout=2))
+
+# --- Translation cache ---
+# Tier 1: in-process LRU keyed on (text, src_lang, dest_lang).
+# Tier 2: Redis (if configured) or a SQLite table, keyed on a blake2b hash of the same triple.
+_translation_lru = OrderedDict()
+_translation_lru_lock = threading.Lock()
+# One SQLite connection per process, shared by all threads/greenlets under _sqlite_lock
+_sqlite_conn = None
+_sqlite_conn_pid = None
+_sqlite_lock = threading.Lock()
+_cache_prune_interval = 60 * 60
+_cache_last_prune = 0.0
+# SQLite limits the number of bound parameters per statement
+_sqlite_lookup_chunk = 500
+
+def _get_cache_db():
+    """
+    Returns this process's SQLite connection, opening it and creating the cache table on
+    first use. Callers must hold _sqlite_lock.
+    """
+    global _sqlite_conn, _sqlite_conn_pid
+    # A connection inherited across fork must not be used, so each process opens its own
+    if _sqlite_conn is None or _sqlite_conn_pid != os.getpid():
+        conn = sqlite3.connect(app.config['TRANSLATION_CACHE_DB'], timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'hash BLOB PRIMARY KEY, translated TEXT NOT NULL, detected_src TEXT, ts REAL NOT NULL)'
+        )
+        conn.commit()
+        _sqlite_conn, _sqlite_conn_pid = conn, os.getpid()
+    return _sqlite_conn
+
+def _cache_hash(text, src_lang, dest_lang):
+    return hashlib.blake2b((src_lang + '\0' + dest_lang + '\0' + text).encode('utf-8'), digest_size=16).digest()
+
+def _lru_put(key, value):
+    with _translation_lru_lock:
+        _translation_lru[key] = value
+        _translation_lru.move_to_end(key)
+        while len(_translation_lru) > app.config['TRANSLATION_CACHE_SIZE']:
+            _translation_lru.popitem(last=False)
+
+def _shared_cache_get_many(hashes):
+    """Looks hashes up in Redis (one MGET) or SQLite. Returns {hash: (translated, detected_src)} for hits."""
+    if redis_client is not None:
+        try:
+            values = redis_client.mget([f"tr:{h.hex()}" for h in hashes])
+        except redis.RedisError as e:
+            logger.warning("Translation cache read error: %s", e)
+            return {}
+        hits = {}
+        for h, value in zip(hashes, values):
+            if value is None:
+                continue
+            try:
+                entry = json.loads(value)
+                hits[h] = (entry['text'], entry['detected'])
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning("Ignoring malformed translation cache entry tr:%s: %s", h.hex(), e)
+        return hits
+
+    hits = {}
+    min_ts = time.time() - app.config['TRANSLATION_CACHE_TTL']
+    try:
+        with _sqlite_lock:
+            conn = _get_cache_db()
+            for start in range(0, len(hashes), _sqlite_lookup_chunk):
+                chunk = hashes[start:start + _sqlite_lookup_chunk]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT hash, translated, detected_src FROM cache WHERE hash IN ({placeholders}) AND ts >= ?',
+                    (*chunk, min_ts)
+                ).fetchall()
+                hits.update((row[0], (row[1], row[2])) for row in rows)
+    except sqlite3.Error as e:
+        logger.warning("Translation cache read error: %s", e)
+    return hits
+
+def _cache_get_many(texts, src_lang, dest_lang):
+    """
+    Looks up several texts in the LRU, then the shared tier in a single round trip.
+    Returns a list with (translated, detected_src) for each hit and None for each miss.
+    """
+    results = [None] * len(texts)
+    missing = {}
+    with _translation_lru_lock:
+        for index, text in enumerate(texts):
+            key = (text, src_lang, dest_lang)
+            cached = _translation_lru.get(key)
+            if cached is not None:
+                _translation_lru.move_to_end(key)
+                results[index] = cached
+            else:
+                missing.setdefault(key, []).append(index)
+    if not missing:
+        return results
+
+    hashes = {_cache_hash(*key): key for key in missing}
+    for h, value in _shared_cache_get_many(list(hashes)).items():
+        key = hashes[h]
+        _lru_put(key, value)
+        for index in missing[key]:
+            results[index] = value
+    return results
+
+def _cache_put_many(entries):
+    """
+    Stores (text, src_lang, dest_lang, translated_text, detected_src) entries in both cache
+    tiers with one shared-tier write, pruning expired SQLite rows now and then.
+    """
+    global _cache_last_prune
+    if not entries:
+        return
+    for text, src_lang, dest_lang, translated_text, detected_src in entries:
+        _lru_put((text, src_lang, dest_lang), (translated_text, detected_src))
+
+    if redis_client is not None:
+        try:
+            pipeline = redis_client.pipeline(transaction=False)
+            for text, src_lang, dest_lang, translated_text, detected_src in entries:
+                pipeline.setex(
+                    f"tr:{_cache_hash(text, src_lang, dest_lang).hex()}",
+                    app.config['TRANSLATION_CACHE_TTL'],
+                    json.dumps({'text': translated_text, 'detected': detected_src})
+                )
+            pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning("Translation cache write error: %s", e)
+        return
 
-# Initialize Translator
-translator = Translator()
+    now = time.time()
+    try:
+        with _sqlite_lock:
+            conn = _get_cache_db()
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache (hash, translated, detected_src, ts) VALUES (?, ?, ?, ?)',
+                [(_cache_hash(text, src_lang, dest_lang), translated_text, detected_src, now)
+                 for text, src_lang, dest_lang, translated_text, detected_src in entries]
+            )
+            if now - _cache_last_prune > _cache_prune_interval:
+                _cache_last_prune = now
+                conn.execute('DELETE FROM cache WHERE ts < ?', (now - app.config['TRANSLATION_CACHE_TTL'],))
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("Translation cache write error: %s", e)
 
 # Helper function for cleaner language name handling
+@functools.lru_cache(maxsize=256)
 def get_language_name(code):
     """Returns the full language name for a given two-letter code."""
     return LANGUAGES.get(code.lower(), f"Unknown ({code})")
 
-# Function to translate text with retry logic
+def detect_language_locally(text):
+    """
+    Identifies the language of text with the local fastText model. Returns a googletrans
+    language code, or None if the model isn't loaded, isn't confident enough, or
+    predicts a language Google Translate doesn't support.
+    """
+    if lid_model is None:
+        return None
+    try:
+        labels, probabilities = lid_model.predict(text.replace('\n', ' '), k=1)
+    except Exception as e:
+        logger.warning("Local language detection error: %s", e)
+        return None
+
+    lang_code = labels[0].replace('__label__', '')
+    lang_code = _FASTTEXT_TO_GOOGLETRANS.get(lang_code, lang_code)
+    if probabilities[0] < app.config['LOCAL_LID_MIN_CONFIDENCE'] or lang_code not in LANGUAGES:
+        return None
+    return lang_code
+
+# --- Circuit breaker ---
+# Once Google answers "too many requests", every worker thread in this process stops
+# calling it until the cooldown expires, instead of retrying into a longer block.
+_circuit_open_until = 0.0
+
+def _circuit_is_open():
+    return time.monotonic() < _circuit_open_until
+
+def _trip_circuit():
+    global _circuit_open_until
+    _circuit_open_until = time.monotonic() + app.config['TRANSLATION_CIRCUIT_COOLDOWN']
+    logger.warning("Rate limited by Google Translate. Pausing upstream calls for %s seconds.",
+                   app.config['TRANSLATION_CIRCUIT_COOLDOWN'])
+
+def _is_rate_limit_error(error):
+    message = str(error).lower()
+    return "too many requests" in message or "429" in message
+
+# --- Translation micro-batching ---
+# Each (src_lang, dest_lang) pair gets its own job queue and daemon worker thread.
+# Jobs are (text, future, max_retries, initial_delay, origin) tuples, where origin identifies
+# the request that queued them; the worker resolves each future with (translated_text, detected_src).
+_batch_queues = {}
+_batch_queues_lock = threading.Lock()
+# googletrans can't translate a list in one request, so a batch is sent as a single
+# newline-joined text and the translation is split back into lines. This records whether
+# Google kept one output line per input line: None until known, and once a batch comes
+# back with the wrong number of lines, batching is switched off for this process.
+_joined_batches_work = None
+# Shared pool for retrying batch items one by one. The batch worker hands retries off and
+# goes straight back to its queue, so one item backing off doesn't stall its language pair.
+_retry_pool = ThreadPoolExecutor(max_workers=16)
+
+def _batch_queue_for(src_lang, dest_lang):
+    """Returns the job queue for a language pair, starting its worker on first use."""
+    key = (src_lang, dest_lang)
+    with _batch_queues_lock:
+        jobs = _batch_queues.get(key)
+        if jobs is None:
+            jobs = queue.Queue()
+            _batch_queues[key] = jobs
+            threading.Thread(target=_batch_worker, args=(jobs, src_lang, dest_lang), daemon=True).start()
+    return jobs
+
+def _batch_worker(jobs, src_lang, dest_lang):
+    """Drains up to TRANSLATION_BATCH_SIZE jobs, waiting at most TRANSLATION_BATCH_LATENCY_MS for more."""
+    max_size = app.config['TRANSLATION_BATCH_SIZE']
+    max_latency = app.config['TRANSLATION_BATCH_LATENCY_MS'] / 1000
+    while True:
+        batch = [jobs.get()]
+        deadline = time.monotonic() + max_latency
+        while len(batch) < max_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(jobs.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _translate_batch(batch, src_lang, dest_lang)
+
+def _translate_joined(texts, src_lang, dest_lang):
+    """
+    Translates texts (none containing a newline) with one newline-joined Google Translate
+    call. Returns a list of (translated_text, detected_src), or None if the call failed or
+    the translation couldn't be split back into one line per text.
+    """
+    global _joined_batches_work
+    logger.debug("Translating batch of %d texts from %s to %s", len(texts), src_lang, dest_lang)
+    translated = translator.translate('\n'.join(texts), src=src_lang, dest=dest_lang)
+    lines = translated.text.split('\n') if translated and translated.text else []
+    if len(lines) != len(texts) or not all(line.strip() for line in lines):
+        _joined_batches_work = False
+        logger.warning("Batch translation came back with %d lines for %d texts. "
+                       "Disabling batching and retrying items individually.", len(lines), len(texts))
+        return None
+    _joined_batches_work = True
+    return [(line.strip(), translated.src) for line in lines]
+
+def _translate_batch(batch, src_lang, dest_lang):
+    """
+    Translates a batch of jobs with a single Google Translate call and resolves
+    their futures. If the batch call fails, each item is retried on its own.
+    """
+    if _circuit_is_open():
+        _complete_jobs(batch, [(None, None)] * len(batch), src_lang, dest_lang)
+        return
+
+    # Texts that contain a newline can't be split back out of a joined batch
+    joinable = [job for job in batch if '\n' not in job[0]]
+    individual = [job for job in batch if '\n' in job[0]]
+    if src_lang == 'auto':
+        # Google detects one source language for a whole joined text, so only sentences
+        # of the same request are joined; unrelated requests may be in other languages
+        groups = {}
+        for job in joinable:
+            groups.setdefault(job[4], []).append(job)
+        groups = list(groups.values())
+    else:
+        groups = [joinable]
+
+    for index, group in enumerate(groups):
+        if len(group) < 2 or _joined_batches_work is False:
+            individual += group
+            continue
+        try:
+            results = _translate_joined([job[0] for job in group], src_lang, dest_lang)
+        except Exception as e:
+            results = None
+            if _is_rate_limit_error(e):
+                _trip_circuit()
+                pending = individual + [job for rest in groups[index:] for job in rest]
+                _complete_jobs(pending, [(None, None)] * len(pending), src_lang, dest_lang)
+                return
+            logger.warning("Batch translation error: %s. Retrying items individually.", e)
+        if results is not None:
+            _complete_jobs(group, results, src_lang, dest_lang)
+        else:
+            individual += group
+
+    def retry_job(job):
+        text, _, max_retries, initial_delay, _ = job
+        try:
+            result = _translate_with_retry(text, src_lang, dest_lang, max_retries, initial_delay)
+        except Exception as e:
+            logger.error("Unexpected error translating %r: %s", text, e)
+            result = (None, None)
+        _complete_jobs([job], [result], src_lang, dest_lang)
+
+    for job in individual:
+        _retry_pool.submit(retry_job, job)
+
+# In-flight translations keyed on (text, src_lang, dest_lang), so concurrent identical
+# requests wait on the first one's upstream call instead of issuing their own
+_inflight_translations = {}
+_inflight_translations_lock = threading.Lock()
+
+def _complete_jobs(jobs, results, src_lang, dest_lang):
+    """
+    Resolves the jobs' futures first, so every waiter wakes up right away, then caches
+    the successful translations in a single write and retires the jobs from the in-flight map.
+    """
+    for (_, future, _, _, _), result in zip(jobs, results):
+        future.set_result(result)
+    try:
+        _cache_put_many([
+            (text, src_lang, dest_lang, translated_text, detected_src)
+            for (text, _, _, _, _), (translated_text, detected_src) in zip(jobs, results)
+            if translated_text is not None
+        ])
+    finally:
+        # Retired only after caching, so a request arriving in between can't miss both
+        with _inflight_translations_lock:
+            for text, _, _, _, _ in jobs:
+                _inflight_translations.pop((text, src_lang, dest_lang), None)
+
+def _translation_future(text, src_lang, dest_lang, max_retries, initial_delay, origin):
+    """
+    Returns a Future for (translated_text, detected_src) of a cache miss: shared with an
+    identical in-flight request, or newly queued for the next batch.
+    """
+    key = (text, src_lang, dest_lang)
+    with _inflight_translations_lock:
+        future = _inflight_translations.get(key)
+        if future is not None:
+            return future
+        future = Future()
+        _inflight_translations[key] = future
+    _batch_queue_for(src_lang, dest_lang).put((text, future, max_retries, initial_delay, origin))
+    return future
+
+# Sentence boundaries; the captured whitespace is kept so the output preserves spacing
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])(\s+)')
+
+# Function to translate text, served from the cache when possible
 def translate_text_logic(text, src_lang, dest_lang, max_retries=3, initial_delay=1):
+    """
+    Translates text sentence by sentence, so sentences seen before are served from the
+    LRU and SQLite caches and only the misses are queued (together) for Google Translate.
+    Concurrent calls for the same sentence and language pair share a single upstream request.
+    Returns translated text and the detected source language code.
+    """
+    # Splitting only saves quota if the missed sentences go upstream as one joined call;
+    # until that is known to work, the text is translated whole
+    parts = _SENTENCE_BOUNDARY_RE.split(text) if _joined_batches_work else [text]
+    sentences, separators = parts[0::2], parts[1::2]
+
+    # Queue every miss before waiting on any, so they all land in the same batch
+    results = _cache_get_many(sentences, src_lang, dest_lang)
+    origin = object()
+    futures = {
+        index: _translation_future(sentence, src_lang, dest_lang, max_retries, initial_delay, origin)
+        for index, sentence in enumerate(sentences) if results[index] is None
+    }
+    for index, future in futures.items():
+        results[index] = future.result()
+    if any(translated_text is None for translated_text, _ in results):
+        return None, None
+
+    translated_parts = [results[0][0]]
+    for separator, (translated_text, _) in zip(separators, results[1:]):
+        translated_parts += [separator, translated_text]
+    detected_srcs = Counter(detected_src for _, detected_src in results if detected_src)
+    detected_src = detected_srcs.most_common(1)[0][0] if detected_srcs else None
+    return ''.join(translated_parts), detected_src
+
+def warm_up_translator():
+    """
+    Sends a throwaway two-line translation so the first real request finds DNS, TLS and the
+    pool already warm, and so we learn whether newline-joined batches come back line for line.
+    """
+    try:
+        _translate_joined(["Hello.", "Goodbye."], "en", "es")
+        logger.info("Translator connection warmed up (joined batches %s).",
+                    "supported" if _joined_batches_work else "not supported")
+    except Exception as e:
+        logger.warning("Translator warm-up failed: %s", e)
+
+if app.config['TRANSLATOR_PREWARM']:
+    threading.Thread(target=warm_up_translator, daemon=True).start()
+
+# Function to call Google Translate with retry logic
+def _translate_with_retry(text, src_lang, dest_lang, max_retries=3, initial_delay=1):
     """
     Translates text with retry mechanism for transient errors.
     Returns translated text and the detected source language code.
     """
     retries = 0
     while retries < max_retries:
+        if _circuit_is_open():
+            logger.debug("Circuit open after rate limiting; not translating %r.", text)
+            return None, None
         try:
-            print(f"Attempting translation (retry {retries + 1}/{max_retries}): '{text}' from {src_lang} to {dest_lang}")
+            logger.debug("Attempting translation (retry %d/%d): %r from %s to %s", retries + 1, max_retries, text, src_lang, dest_lang)
             translated = translator.translate(text, src=src_lang, dest=dest_lang)
             if translated and translated.text:
                 return translated.text, translated.src
             else:
-                print(f"Translation attempt {retries + 1} returned empty or None for '{text}'.")
+                logger.debug("Translation attempt %d returned empty or None for %r.", retries + 1, text)
                 raise Exception("Empty or invalid translation response from Google Translate.")
 
         except Exception as e:
             retries += 1
-            print(f"Translation error (attempt {retries}/{max_retries}): {e}")
-            if "too many requests" in str(e).lower() or "timeout" in str(e).lower() or "connection" in str(e).lower() or "bad response from google translate" in str(e).lower():
-                delay = initial_delay * (2 ** (retries - 1))
-                print(f"Retrying in {delay} seconds...")
+            logger.warning("Translation error (attempt %d/%d): %s", retries, max_retries, e)
+            if _is_rate_limit_error(e):
+                _trip_circuit()
+                return None, None
+            if "timeout" in str(e).lower() or "connection" in str(e).lower() or "bad response from google translate" in str(e).lower():
+                # Jitter the exponential backoff so clients that failed together don't retry together
+                delay = initial_delay * (2 ** (retries - 1)) * random.uniform(0.5, 1.5)
+                logger.info("Retrying in %.2f seconds...", delay)
                 time.sleep(delay)
             else:
-                print(f"Non-retryable or unexpected error: {e}. Not retrying.")
+                logger.warning("Non-retryable or unexpected error: %s. Not retrying.", e)
                 return None, None
 
-    print(f"Failed to translate '{text}' after {max_retries} attempts.")
+    logger.error("Failed to translate %r after %d attempts.", text, max_retries)
     return None, None
 
+# --- Audio cache ---
+# MP3 files are named after a hash of (lang, slow, text), so identical phrases reuse
+# the same file. A daemon thread periodically deletes files nobody has read lately.
+_audio_sweep_interval = 60 * 60
+_audio_sweeper_started = False
+_audio_sweeper_lock = threading.Lock()
+
+# Job ids are 16-character URL-safe base64 strings (a 12-byte content hash)
+_AUDIO_JOB_ID_RE = re.compile(r'[A-Za-z0-9_-]{16}')
+
+def _audio_job_id(text, lang_code, slow_audio):
+    """Returns the content hash naming the MP3 for this phrase, also used as its job id."""
+    gtts_lang_code = lang_code.split('-')[0]
+    digest = hashlib.blake2b(f"{gtts_lang_code}|{bool(slow_audio)}|{text}".encode('utf-8'), digest_size=12)
+    return base64.urlsafe_b64encode(digest.digest()).decode('ascii')
+
+def _write_file_atomically(filepath, write):
+    """Calls write(temp_path) and renames the result into place, so readers never see a partial file."""
+    temp_filepath = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(temp_filepath)
+    os.replace(temp_filepath, filepath)
+
+def _restore_shared_audio(job_id, audio_filepath):
+    """Copies audio synthesized by another worker or host from Redis to disk. Returns True on success."""
+    if redis_client is None:
+        return False
+    try:
+        audio_bytes = redis_client.get(f"tts:{job_id}")
+    except redis.RedisError as e:
+        logger.warning("Audio cache read error: %s", e)
+        return False
+    if audio_bytes is None:
+        return False
+
+    def write(path):
+        with open(path, 'wb') as f:
+            f.write(audio_bytes)
+    _write_file_atomically(audio_filepath, write)
+    return True
+
+def _share_audio(job_id, audio_filepath):
+    """Publishes a freshly synthesized MP3 to Redis for the other workers and hosts."""
+    if redis_client is None:
+        return
+    try:
+        with open(audio_filepath, 'rb') as f:
+            redis_client.setex(f"tts:{job_id}", app.config['AUDIO_CACHE_MAX_AGE_DAYS'] * 24 * 60 * 60, f.read())
+    except (OSError, redis.RedisError) as e:
+        logger.warning("Audio cache write error: %s", e)
+
+def _sweep_audio_files():
+    """Deletes audio files whose last access is older than AUDIO_CACHE_MAX_AGE_DAYS."""
+    while True:
+        cutoff = time.time() - app.config['AUDIO_CACHE_MAX_AGE_DAYS'] * 24 * 60 * 60
+        try:
+            with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+                for entry in entries:
+                    # Every worker process runs a sweeper, so another one may delete a file first
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                        if max(stat.st_atime, stat.st_mtime) < cutoff:
+                            os.remove(entry.path)
+                            logger.info("Evicted stale audio file: %s", entry.path)
+                    except FileNotFoundError:
+                        continue
+        except OSError as e:
+            logger.warning("Audio cache sweep error: %s", e)
+        time.sleep(_audio_sweep_interval)
+
+def _start_audio_sweeper():
+    """Starts the sweeper thread once per process (lazily, so it also runs in forked workers)."""
+    global _audio_sweeper_started
+    with _audio_sweeper_lock:
+        if not _audio_sweeper_started:
+            _audio_sweeper_started = True
+            threading.Thread(target=_sweep_audio_files, daemon=True).start()
+
 # Function to synthesize speech and save to a file on the server
 def synthesize_speech_to_file(text, lang_code, slow_audio=False):
     """
-    Converts text to speech using gTTS, saves it to a temporary file
+    Converts text to speech using gTTS, saves it to a content-addressed file
     in the static/audio directory, and returns the relative URL.
+    Reuses the existing file when the same phrase was synthesized before.
     Includes an option for slow speech.
     """
     try:
+        _start_audio_sweeper()
         gtts_lang_code = lang_code.split('-')[0]
-        print(f"Generating speech for text: '{text[:50]}...' in language: {gtts_lang_code}, Slow: {slow_audio}")
-        tts = gTTS(text=text, lang=gtts_lang_code, slow=slow_audio)
-
-        audio_filename = f"{uuid.uuid4()}.mp3"
+        job_id = _audio_job_id(text, lang_code, slow_audio)
+        audio_filename = f"{job_id}.mp3"
         audio_filepath = os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)
 
-        tts.save(audio_filepath)
-        print(f"Audio saved to: {audio_filepath}")
+        if os.path.exists(audio_filepath):
+            logger.debug("Reusing cached audio: %s", audio_filepath)
+            return f"/static/audio/{audio_filename}"
+        if _restore_shared_audio(job_id, audio_filepath):
+            logger.debug("Restored shared audio to: %s", audio_filepath)
+            return f"/static/audio/{audio_filename}"
+
+        logger.debug("Generating speech for text: %r in language: %s, Slow: %s", text[:50], gtts_lang_code, slow_audio)
+        tts = gTTS(text=text, lang=gtts_lang_code, slow=slow_audio)
+
+        # Save under a temporary name first so a half-written file is never served as a cache hit
+        _write_file_atomically(audio_filepath, tts.save)
+        _share_audio(job_id, audio_filepath)
+        logger.debug("Audio saved to: %s", audio_filepath)
         return f"/static/audio/{audio_filename}"
     except Exception as e:
-        print(f"gTTS audio generation error: {e}")
+        logger.error("gTTS audio generation error: %s", e)
         return None
 
+# --- Background speech synthesis ---
+# gTTS runs on a shared pool so /translate can answer as soon as the text is ready.
+# Pending jobs are tracked by job id until the client has seen their result; failures are
+# kept for at most _FAILED_AUDIO_JOB_TTL seconds, since clients that stop polling never see them.
+TTS_POOL = ThreadPoolExecutor(max_workers=8)
+_FAILED_AUDIO_JOB_TTL = 60
+_audio_jobs = {}
+_failed_audio_jobs = {}  # job id -> time.monotonic() of the failure
+_audio_jobs_lock = threading.Lock()
+
+def _drop_audio_job(job_id, future):
+    """Removes a job from the registry unless it has been replaced by a retry. Call with _audio_jobs_lock held."""
+    if _audio_jobs.get(job_id) is future:
+        del _audio_jobs[job_id]
+        _failed_audio_jobs.pop(job_id, None)
+
+def _forget_finished_audio_job(job_id, future):
+    # Successful jobs can be answered from disk, so only failures need to be kept around
+    with _audio_jobs_lock:
+        if future.result():
+            _drop_audio_job(job_id, future)
+        elif _audio_jobs.get(job_id) is future:
+            _failed_audio_jobs[job_id] = time.monotonic()
+
+def _submit_speech_job(job_id, text, lang_code, slow_audio):
+    """Returns a Future for the audio URL, reusing a cached file or an identical pending job."""
+    audio_filename = f"{job_id}.mp3"
+    if os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)):
+        future = Future()
+        future.set_result(f"/static/audio/{audio_filename}")
+        return future
+
+    with _audio_jobs_lock:
+        expired = time.monotonic() - _FAILED_AUDIO_JOB_TTL
+        for failed_job_id in [key for key, failed_at in _failed_audio_jobs.items() if failed_at < expired]:
+            del _failed_audio_jobs[failed_job_id]
+            _audio_jobs.pop(failed_job_id, None)
+        future = _audio_jobs.get(job_id)
+        if future is not None and not (future.done() and not future.result()):
+            return future
+        future = TTS_POOL.submit(synthesize_speech_to_file, text, lang_code, slow_audio)
+        _audio_jobs[job_id] = future
+        _failed_audio_jobs.pop(job_id, None)
+    # Registered outside the lock: on an already finished job the callback runs right here
+    # and takes the lock itself
+    future.add_done_callback(functools.partial(_forget_finished_audio_job, job_id))
+    return future
+
 # --- Flask Routes ---
 
 @app.route('/')
 def index():
     """Renders the main translation page."""
-    sorted_languages = sorted(LANGUAGES.items(), key=lambda item: item[1])
-    return render_template('index.html', languages=sorted_languages)
+    return render_template('index.html', languages=SORTED_LANGUAGES)
 
 
 @app.route('/translate', methods=['POST'])
@@ -95,6 +775,7 @@ def translate():
     dest_lang_code = data.get('dest_lang', 'ta').lower()
     speak_output = data.get('speak_output', False)
     slow_speech = data.get('slow_speech', False) # New: Get slow speech preference
+    wait_for_audio = data.get('wait_for_audio', False) # Block until audio is ready instead of polling
 
     src_lang_name = get_language_name(src_lang_code)
     dest_lang_name = get_language_name(dest_lang_code)
@@ -104,16 +785,36 @@ def translate():
             'original_text': '',
             'translated_text': 'Please enter some text to translate.',
             'audio_url': None,
+            'audio_job_id': None,
+            'audio_status_url': None,
             'src_lang_name': src_lang_name,
             'dest_lang_name': dest_lang_name,
             'detected_src_lang_code': None
         }), 200
 
-    translated_result_text, detected_src_lang_code = translate_text_logic(input_text, src_lang_code, dest_lang_code)
+    # Detect 'auto' sources locally when we can: text already in the target language needs
+    # no translation at all, and otherwise Google gets an explicit source language
+    local_src_lang_code = detect_language_locally(input_text) if src_lang_code == 'auto' else None
+    if local_src_lang_code and local_src_lang_code == dest_lang_code:
+        translated_result_text, detected_src_lang_code = input_text, local_src_lang_code
+    else:
+        translated_result_text, detected_src_lang_code = translate_text_logic(
+            input_text, local_src_lang_code or src_lang_code, dest_lang_code)
 
     audio_url = None
+    audio_job_id = None
+    audio_status_url = None
     if translated_result_text and speak_output:
-        audio_url = synthesize_speech_to_file(translated_result_text, dest_lang_code, slow_audio=slow_speech)
+        audio_job_id = _audio_job_id(translated_result_text, dest_lang_code, slow_speech)
+        future = _submit_speech_job(audio_job_id, translated_result_text, dest_lang_code, slow_speech)
+        if wait_for_audio or future.done():
+            audio_url = future.result()
+            if audio_url is None:
+                # This response already reports the failure; nobody will poll for it
+                with _audio_jobs_lock:
+                    _drop_audio_job(audio_job_id, future)
+        else:
+            audio_status_url = url_for('audio_status', job_id=audio_job_id)
 
     final_src_lang_display_name = src_lang_name
     if src_lang_code == 'auto' and detected_src_lang_code:
@@ -123,6 +824,8 @@ def translate():
         'original_text': input_text,
         'translated_text': translated_result_text if translated_result_text is not None else "Translation failed. Please try again or check server logs.",
         'audio_url': audio_url,
+        'audio_job_id': audio_job_id,
+        'audio_status_url': audio_status_url,
         'src_lang_name': final_src_lang_display_name,
         'dest_lang_name': dest_lang_name,
         'detected_src_lang_code': detected_src_lang_code
@@ -130,8 +833,44 @@ def translate():
     return jsonify(response_data)
 
 
+@app.route('/static/audio/<path:filename>')
+def audio_file(filename):
+    """Serves synthesized MP3s with far-future, immutable caching headers."""
+    response = send_from_directory(app.config['UPLOAD_FOLDER'], filename,
+                                   max_age=app.config['AUDIO_CACHE_MAX_AGE'], conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.route('/audio_status/<job_id>')
+def audio_status(job_id):
+    """Reports whether the speech for a /translate response is ready, and its URL once it is."""
+    if not _AUDIO_JOB_ID_RE.fullmatch(job_id):
+        return jsonify({'status': 'unknown', 'audio_url': None}), 404
+
+    with _audio_jobs_lock:
+        future = _audio_jobs.get(job_id)
+        if future is not None and future.done():
+            _drop_audio_job(job_id, future)
+
+    if future is not None:
+        if not future.done():
+            return jsonify({'status': 'pending', 'audio_url': None})
+        audio_url = future.result()
+        return jsonify({'status': 'done' if audio_url else 'failed', 'audio_url': audio_url})
+
+    # The job may have been handled by another worker process or host; the file is the source of truth
+    audio_filename = f"{job_id}.mp3"
+    audio_filepath = os.path.join(app.config['UPLOAD_FOLDER'], audio_filename)
+    if os.path.exists(audio_filepath) or _restore_shared_audio(job_id, audio_filepath):
+        return jsonify({'status': 'done', 'audio_url': f"/static/audio/{audio_filename}"})
+    return jsonify({'status': 'unknown', 'audio_url': None}), 404
+
+
 # --- Main execution ---
+# Development server only; in production run `gunicorn app:app` (see gunicorn.conf.py)
 if __name__ == '__main__':
-    print("Starting Flask web server...")
-    print(f"Access the translator at: http://127.0.0.1:5000")
+    logger.info("Starting Flask web server...")
+    logger.info("Access the translator at: http://127.0.0.1:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
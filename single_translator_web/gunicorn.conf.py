@@ -0,0 +1,26 @@
+# Production server settings. Run from this directory with:
+#     gunicorn app:app
+# (requires gunicorn and gevent; put nginx in front, see deploy/nginx.conf)
+import multiprocessing
+import os
+import threading
+
+bind = '127.0.0.1:8000'
+workers = 2 * multiprocessing.cpu_count() + 1
+# gevent workers let each process keep many requests waiting on Google at once
+worker_class = 'gevent'
+worker_connections = 1000
+# Longer than nginx's upstream keep-alive so idle proxy connections are reused, not reset
+keepalive = 65
+# Import the app once in the master so the translator, caches and SORTED_LANGUAGES
+# are built once and shared copy-on-write by every worker
+preload_app = True
+
+# The master must not open connections to Google before forking, or the workers would
+# share its sockets. Each worker warms up its own connection instead (see below).
+os.environ.setdefault('TRANSLATOR_PREWARM', '0')
+
+
+def post_worker_init(worker):
+    import app
+    threading.Thread(target=app.warm_up_translator, daemon=True).start()